@@ -12,13 +12,32 @@ installed (`pip install streamlit`).  Then run it using:
   streamlit run ordering_app.py
 
 Share the resulting URL with your friends so they can add their orders.
+
+To measure where each rerun spends its time, install the optional
+streamlit-profiler package (`pip install streamlit-profiler`) and start the
+app with the PROFILE environment variable set:
+
+  PROFILE=1 streamlit run ordering_app.py
+
+The profiler report is then shown at the bottom of the page.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
+import contextlib
+import csv
+import itertools
 import os
+import sys
+import tempfile
+import uuid
 import datetime
-from collections import defaultdict
+import functools
+from collections.abc import Callable, Iterator, Mapping
+from types import MappingProxyType
+from typing import Any, Final
+from operator import itemgetter
 
 # Optional mapping of category names to image URLs.  If a category has an
 # associated image (for example, a representative photo from the Mister Tamo
@@ -32,454 +51,986 @@ from collections import defaultdict
 # Streamlit can load it.
 category_images: dict[str, str | None] = {}
 
-# Path to the CSV file used for aggregating orders across sessions.  When running
-# on Streamlit Cloud the working directory is persistent for the duration of
-# your app instance, so this file will accumulate all submitted orders.  If you
-# redeploy the app the file will be reset.
-ORDERS_FILE = "orders.csv"
+# The usable entries of `category_images`, checked once: categories without a
+# URL or with a URL that does not start with "https://" are left out, so the
+# render path only needs a dictionary lookup.
+CATEGORY_IMAGES: dict[str, str] = {
+    category: url
+    for category, url in category_images.items()
+    if url and url.startswith("https://")
+}
+
+# Paths to the CSV files used for aggregating orders across sessions.  When
+# running on Streamlit Cloud the working directory is persistent for the
+# duration of your app instance, so these files will accumulate all submitted
+# orders.  If you redeploy the app the files will be reset.  Orders are stored
+# normalised: one header row per submission (who ordered and when) and one row
+# per ordered item, linked by the order id.
+ORDERS_HEADER_FILE = "orders_header.csv"
+ORDERS_LINES_FILE = "orders_lines.csv"
+
+# Single orders file written by earlier versions of the app, with one row per
+# order line.  migrate_legacy_orders() splits it into the two files above.
+LEGACY_ORDERS_FILE = "orders.csv"
+
+# Columns of the orders files, in the order they are written.
+ORDER_HEADER_COLUMNS = ("order_id", "name", "timestamp")
+ORDER_LINE_COLUMNS = ("order_id", "item", "price", "quantity", "line_total")
+
+# Columns of the joined orders table shown in the admin view.
+ORDER_COLUMNS = ("name", "item", "price", "quantity", "line_total", "timestamp")
+
+# Number of rows read at a time when aggregating the order lines.
+ORDERS_CHUNKSIZE = 50_000
+
+# Column types used when loading the orders files.  Names and items repeat
+# across many rows, so they are stored as categoricals; quantities fit in
+# int16.  Money columns stay float64 so that totals do not drift.
+ORDER_HEADER_DTYPES = {
+    "order_id": "string",
+    "name": "category",
+    "timestamp": "string",
+}
+ORDER_LINE_DTYPES = {
+    "order_id": "string",
+    "item": "category",
+    "price": "float64",
+    "quantity": "int16",
+    "line_total": "float64",
+}
+
+# Static page chrome.  Streamlit removes every element that a rerun does not
+# emit again, so the title and introduction cannot be skipped after the first
+# run; main() renders them from these constants on each rerun.
+PAGE_TITLE = "Mister TAMO Order Manager"
+PAGE_ICON = "🍽️"
+APP_TITLE = "Mister TAMO – gestore ordini per la colazione/brunch/aperitivo"
+APP_INTRO = (
+    "Seleziona le quantità per ogni prodotto desiderato. I prezzi sono in euro e"
+    " comprendono il servizio al tavolo. Al termine della selezione troverai un"
+    " riassunto dell'ordine con il totale."
+)
+
+def format_cents(cents: int) -> str:
+    """Format an amount in integer euro cents as a decimal string, e.g. ``"7.50"``."""
+    euros, rem = divmod(cents, 100)
+    return f"{euros}.{rem:02d}"
+
+
+def next_order_id() -> str:
+    """Return a new identifier linking an order header to its lines.
+
+    The id is random rather than counted from the files, so concurrent
+    sessions never have to read the orders or coordinate with each other.
+    Twelve hex digits of a UUID4 keep the repeated key short.
+    """
+    return uuid.uuid4().hex[:12]
+
+
+def _append_csv_rows(path: str, columns: tuple[str, ...], rows) -> None:
+    """Append ``rows`` to the CSV at ``path``, writing ``columns`` if it is new."""
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8", buffering=65536) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if write_header:
+            writer.writerow(columns)
+        writer.writerows(rows)
+
 
-def save_order_to_csv(name: str, order_quantities: dict) -> None:
-    """Append the current user's order to a CSV file.
+def save_order_to_csv(name: str, qtys: np.ndarray) -> None:
+    """Append the current user's order to the orders CSV files.
 
-    Each row in the CSV represents a single menu item and includes the name
-    provided by the user, the item name, price, quantity ordered, the
-    line total and a timestamp.  If the CSV does not yet exist it will be
-    created with the appropriate header.
+    The name provided by the user and a timestamp are written once, as a
+    row of the header file.  Each ordered menu item becomes a row of the
+    lines file with the item name, price, quantity ordered and line total,
+    keyed by the same order id.  Files that do not yet exist are created
+    with the appropriate header.  ``qtys`` holds the quantity of every menu
+    item, indexed by the integer item ids of ``build_menu_soa()``.
     """
-    rows = []
+    idx = np.flatnonzero(qtys)
+    if not idx.size:
+        return
+    migrate_legacy_orders()
+    names, prices_cents, _, _ = build_menu_soa(MENU_VERSION)
+    order_id = next_order_id()
     timestamp = datetime.datetime.now().isoformat(timespec="seconds")
-    for (item_name, price), qty in order_quantities.items():
-        if qty <= 0:
-            continue
-        rows.append(
-            {
-                "name": name,
-                "item": item_name,
-                "price": price,
-                "quantity": qty,
-                "line_total": round(price * qty, 2),
-                "timestamp": timestamp,
-            }
+    # The columns are sliced and computed as NumPy arrays and converted to
+    # Python values once.  A submission is a handful of rows, so they are
+    # written with the csv module rather than through a DataFrame.  Line
+    # totals are exact integer cents; the file still stores euro amounts.
+    item_cents = prices_cents[idx]
+    lines = zip(
+        itertools.repeat(order_id),
+        names[idx].tolist(),
+        map(format_cents, item_cents.tolist()),
+        qtys[idx].tolist(),
+        map(format_cents, (item_cents * qtys[idx]).tolist()),
+    )
+    # The lines go first, so a header row is only written for an order that
+    # has all of its lines on disk.
+    _append_csv_rows(ORDERS_LINES_FILE, ORDER_LINE_COLUMNS, lines)
+    _append_csv_rows(ORDERS_HEADER_FILE, ORDER_HEADER_COLUMNS, [(order_id, name, timestamp)])
+
+
+@contextlib.contextmanager
+def _replacing_csv(path: str) -> Iterator[Any]:
+    """Write a new version of the CSV at ``path`` through a temporary file.
+
+    Yields a csv writer on a temporary file in the same directory.  When the
+    block completes, the temporary file atomically replaces ``path``; if it
+    raises, the temporary file is removed and ``path`` is left as it was.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fout = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".csv", delete=False, newline="", encoding="utf-8"
+        ) as fout:
+            yield csv.writer(fout, lineterminator="\n")
+        os.replace(fout.name, path)
+    except BaseException:
+        # delete=False keeps the temporary file around, so clean it up
+        # unless it has already replaced the original.
+        if fout is not None:
+            os.unlink(fout.name)
+        raise
+
+
+def _filter_csv(path: str, keep: Callable[[int, list[str]], bool]) -> int:
+    """Rewrite the CSV at ``path`` with only the data rows ``keep`` accepts.
+
+    ``keep`` is called with the 0-based index (header excluded) and the
+    fields of every data row.  The file is streamed row by row, so nothing
+    is parsed into a DataFrame and rows that are kept are written back
+    exactly as they were read.  Returns the number of rows dropped.
+    """
+    dropped = 0
+    with open(path, newline="", encoding="utf-8") as fin, _replacing_csv(path) as writer:
+        for i, row in enumerate(csv.reader(fin)):
+            # Row 0 is the header, so data row n is record n + 1.
+            if i == 0 or keep(i - 1, row):
+                writer.writerow(row)
+            else:
+                dropped += 1
+    return dropped
+
+
+def delete_order_row(row_index: int) -> bool:
+    """Remove a single order line (0-based, header excluded) from the CSV.
+
+    The lines file is filtered with ``_filter_csv()``, so a failure leaves
+    it as it was.  When the removed line was the last one of its order, the
+    order's row is dropped from the header file as well, so that file does
+    not keep growing with orders that have no lines left.
+
+    Returns True if a line was removed, or False if the file has no line
+    ``row_index`` (e.g. another session deleted it first).
+    """
+    # The order id is the first field of both files.
+    deleted_id = None
+    remaining_ids = set()
+
+    def keep_line(i: int, row: list[str]) -> bool:
+        nonlocal deleted_id
+        if i == row_index:
+            deleted_id = row[0]
+            return False
+        remaining_ids.add(row[0])
+        return True
+
+    if not _filter_csv(ORDERS_LINES_FILE, keep_line):
+        return False
+    if deleted_id not in remaining_ids and os.path.exists(ORDERS_HEADER_FILE):
+        _filter_csv(ORDERS_HEADER_FILE, lambda _, row: row[0] != deleted_id)
+    return True
+
+
+def migrate_legacy_orders() -> None:
+    """Split an orders file from before the header/lines layout, once.
+
+    Older versions of the app kept every order line, with the customer name
+    and timestamp repeated, in ``LEGACY_ORDERS_FILE``.  If that file exists
+    and neither of the new files does, its rows are rewritten into them:
+    the rows of one submission were written together with the same name and
+    timestamp, so each run of consecutive rows sharing both becomes one
+    order.  The legacy file is then renamed with a ``.migrated`` suffix.
+
+    The order ids are derived from the position of each order
+    (``legacy-0``, ``legacy-1``, ...) rather than drawn at random, so two
+    sessions migrating at the same moment write identical files.
+    """
+    if os.path.exists(ORDERS_LINES_FILE) or os.path.exists(ORDERS_HEADER_FILE):
+        return
+    try:
+        fin = open(LEGACY_ORDERS_FILE, newline="", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    # The lines writer is entered last, so its file replaces the old one
+    # first, as in save_order_to_csv().
+    with (
+        fin,
+        _replacing_csv(ORDERS_HEADER_FILE) as header,
+        _replacing_csv(ORDERS_LINES_FILE) as lines,
+    ):
+        header.writerow(ORDER_HEADER_COLUMNS)
+        lines.writerow(ORDER_LINE_COLUMNS)
+        orders = 0
+        previous = None
+        for row in csv.DictReader(fin):
+            submission = (row["name"], row["timestamp"])
+            if submission != previous:
+                order_id = f"legacy-{orders}"
+                orders += 1
+                header.writerow((order_id, *submission))
+                previous = submission
+            lines.writerow(
+                (order_id, row["item"], row["price"], row["quantity"], row["line_total"])
+            )
+    try:
+        os.replace(LEGACY_ORDERS_FILE, LEGACY_ORDERS_FILE + ".migrated")
+    except FileNotFoundError:
+        # Another session migrated the same file at the same time.
+        pass
+
+
+def _file_version(path: str) -> tuple[int, int] | None:
+    """Return ``(mtime_ns, size)`` of ``path``, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_orders_csv(
+    lines_version: tuple[int, int], header_version: tuple[int, int]
+) -> pd.DataFrame | None:
+    """Parse and join the orders CSV files, returning None if they cannot be read.
+
+    The arguments are not used directly: they identify the versions of the
+    two files on disk, so Streamlit's cache only parses them again after
+    either has been written to.
+    """
+    try:
+        # The default C engine applies the dtypes while parsing, so order ids
+        # that look like numbers (e.g. "012345678901" or "1234e5678901") are
+        # kept verbatim and still match between the two files.
+        lines = pd.read_csv(ORDERS_LINES_FILE, dtype=ORDER_LINE_DTYPES)
+        header = pd.read_csv(ORDERS_HEADER_FILE, dtype=ORDER_HEADER_DTYPES)
+    except Exception:
+        return None
+    # A left join keeps the lines in file order, so row n of the result is
+    # still data row n of the lines file, as delete_order_row() expects.
+    return lines.merge(header, on="order_id", how="left")[list(ORDER_COLUMNS)]
+
+
+def load_orders_dataframe() -> pd.DataFrame | None:
+    """Load all order lines joined with their orders, or None if there are none.
+
+    The joined DataFrame is cached and reused until the modification time
+    or size of either file changes, i.e. until an order is submitted or a
+    line is deleted.
+    """
+    lines_version = _file_version(ORDERS_LINES_FILE)
+    header_version = _file_version(ORDERS_HEADER_FILE)
+    if lines_version is None or header_version is None:
+        return None
+    return _read_orders_csv(lines_version, header_version)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _aggregate_orders_csv(mtime_ns: int, size: int) -> pd.DataFrame | None:
+    """Sum quantities and totals per item over the order lines in chunks.
+
+    Only the lines file is read, since the totals do not depend on who
+    ordered or when.  Only ``ORDERS_CHUNKSIZE`` rows are held in memory at a
+    time: each chunk is reduced to per-item partial sums, which are then
+    merged.  As with ``_read_orders_csv()``, the arguments only identify the
+    file version.  Returns None if the file cannot be read or holds no
+    orders.
+    """
+    try:
+        chunks = pd.read_csv(
+            ORDERS_LINES_FILE,
+            usecols=["item", "quantity", "line_total"],
+            dtype={"item": "string", "quantity": "int64", "line_total": "float64"},
+            chunksize=ORDERS_CHUNKSIZE,
+        )
+        partials = (
+            chunk.groupby("item")[["quantity", "line_total"]].sum() for chunk in chunks
+        )
+        totals = functools.reduce(lambda a, b: a.add(b, fill_value=0), partials)
+    except Exception:
+        return None
+    return (
+        totals.astype({"quantity": "int64"})
+        .rename(columns={"quantity": "quantita", "line_total": "totale"})
+        .reset_index()
+    )
+
+
+def aggregate_orders() -> pd.DataFrame | None:
+    """Return the per-item quantities and totals of all orders, or None.
+
+    The result has the columns ``item``, ``quantita`` and ``totale`` and is
+    cached until the order lines file changes.
+    """
+    version = _file_version(ORDERS_LINES_FILE)
+    if version is None:
+        return None
+    return _aggregate_orders_csv(*version)
+
+
+# Largest quantity accepted for a single item.  Quantities are stored in an
+# int16 array, so this keeps them well inside its range.
+MAX_QUANTITY = 999
+
+# Column configuration shared by every category table.  Prices are formatted
+# by the frontend, so no per-item label has to be built in Python on reruns.
+EDITOR_COLUMN_CONFIG = {
+    "Prezzo": st.column_config.NumberColumn(format="%.2f\u00a0€"),
+    "Quantità": st.column_config.NumberColumn(
+        min_value=0, max_value=MAX_QUANTITY, step=1
+    ),
+}
+
+# Column configuration of the current order summary table.
+SUMMARY_COLUMN_CONFIG = {
+    "Totale": st.column_config.NumberColumn(format="%.2f\u00a0€"),
+}
+
+
+# The Mister TAMO menu: a read-only mapping from category name to a tuple of
+# (item_name, price) pairs.  Prices are floats representing euros.  The
+# inner tuples are compile-time constants, so executing the script again on
+# a rerun only rebuilds the outer mapping.  The app reads the menu through
+# ``CATEGORIES`` and ``MENU``, built from it by ``build_flat_menu()``.
+MENU_BY_CATEGORY: Final[Mapping[str, tuple[tuple[str, float], ...]]] = MappingProxyType({
+    "Aperitivo": (
+        ("Formula Gajardo (Apericena)", 15.0),
+        ("Formula Norcino (Apericena)", 15.0),
+        ("Formula Aperitamo (Aperitivo)", 12.0),
+    ),
+    "Analcolici (non‑alcoholic)": (
+        ("Tamo Fruit (Mela, Arancia, Anguria)", 5.0),
+        ("Hawaii (Fragola, Ananas)", 5.0),
+        ("Esotic (Passion Fruit, Lime, Zucchero di canna, Ginger Beer)", 5.0),
+        ("Virgin Mojito (Tonica, Lime, Zucchero di canna, Menta)", 5.0),
+        ("Virgin Colada (Ananas, Cocco)", 5.0),
+        ("Charlie Tample (Ginger Ale, Cranberry Juice)", 5.0),
+    ),
+    "Spritz": (
+        ("Apertas (Aperol, Cedrata)", 6.0),
+        ("Aperol Spritz", 6.0),
+        ("Campari Spritz", 6.0),
+        ("Calabro Spritz (Amaro del Capo Red Hot, Prosecco)", 7.0),
+        ("Hugo (Liquore di Sambuco, Prosecco, Menta)", 6.0),
+        ("Martini Royale (Martini Bianco, Lime, Prosecco)", 6.0),
+        ("Melon Spritz (Midori, Prosecco)", 6.0),
+        ("Passoa Spritz (Passoa, Prosecco)", 6.0),
+        ("Violetta Spritz (Liquore alla Violetta, Prosecco)", 6.0),
+    ),
+    "Negroni": (
+        ("Negroni", 8.0),
+        ("Negroni Sbagliato", 8.0),
+        ("Boulevardier", 8.0),
+        ("Negroni Bianco", 8.0),
+        ("Negroni al Cioccolato", 8.0),
+        ("Americano", 8.0),  # appears on the after‑dinner drinks list
+    ),
+    "Gin Tonic": (
+        ("Gin Tonic", 8.0),
+        ("Gin Lemon", 8.0),
+        ("Tanqueray Tonic", 10.0),
+        ("Tanqueray No. Ten Tonic", 12.0),
+        ("Malfy Pink Tonic", 12.0),
+        ("Bombay Tonic", 12.0),
+        ("Gin Mare Tonic", 12.0),
+    ),
+    "Mule": (
+        ("Moscow Mule", 8.0),
+        ("London Mule", 8.0),
+        ("Mexican Mule", 8.0),
+        ("Suffering Busterd", 8.0),
+    ),
+    "Pestati": (
+        ("Mojito", 9.0),
+        ("Caipiroska", 9.0),
+        ("Caipiroska Fragola", 9.0),
+        ("Caipiroska Frutti Rossi", 9.0),
+        ("Caipiroska Passion Fruit", 9.0),
+    ),
+    "Sour": (
+        ("Whiskey Sour", 8.0),
+        ("Midori Sour", 8.0),
+        ("Di Saronno Sour", 8.0),
+        ("New York Sour", 8.0),
+    ),
+    "Cocktail Pre‑Dinner": (
+        ("Morgana", 8.0),
+        ("Sky Walker", 8.0),
+        ("Paloma", 8.0),
+        ("Tequila Sunrise", 8.0),
+    ),
+    "Cocktail After‑Dinner": (
+        ("Mister Tamo", 8.0),
+        ("Alexander", 8.0),
+        ("Satan’s Whiskers", 8.0),
+        ("Long Island Ice Tea", 8.0),
+        ("Japanese Ice Tea", 8.0),
+        ("Miami Ice Tea", 8.0),
+        ("Pina Colada", 8.0),
+    ),
+    "Tiki Cocktails": (
+        ("Jungle Birth", 10.0),
+        ("Mister Funk", 10.0),
+    ),
+    "Salty dishes (Brunch)": (
+        ("Avocado Toast", 10.0),
+        ("Eggs Royal", 12.0),
+        ("Club Sandwich Tacchino", 9.0),
+        ("Club Sandwich Royal", 9.0),
+        ("English Breakfast", 10.0),
+        ("American Breakfast", 12.0),
+        ("French Toast", 9.0),
+        ("Caesar Salad (Brunch)", 12.0),
+    ),
+    "Primi e Secondi (Brunch)": (
+        ("Tonnarello Cacio e Pepe", 11.0),
+        ("Tonnarello Carbonara", 11.0),
+        ("Mezza Manica all’Amatriciana", 11.0),
+        ("Tonnarello Pomodoro e Basilico", 9.0),
+        ("Tagliata di Petto di Pollo (Lime e Menta)", 13.0),
+        ("Veggy Wrap", 9.0),
+    ),
+    "Sweet brunch (Pancakes e Waffles)": (
+        ("Baby Pancakes", 5.0),
+        ("Pancakes Cioccolato Bianco e Frutti di Bosco", 8.0),
+        ("Pancakes Nutella e Banana", 7.0),
+        ("Pancakes Nutella, Fragole e Panna", 8.0),
+        ("Pancakes Pistacchio", 7.0),
+        ("Pancakes Sciroppo Acero", 8.0),
+        ("Waffle Crema e Frutti di Bosco", 8.0),
+        ("Waffle Nutella e Fragola", 7.0),
+        ("Waffle Pistacchio", 7.0),
+        ("Waffle Sciroppo Acero", 7.0),
+        ("Waffle Cioccolato Bianco e Frutti di Bosco", 8.0),
+    ),
+    "Bio Zone": (
+        ("Centrifugato Depurante", 7.0),
+        ("Centrifugato Antiossidante", 7.0),
+        ("Centrifugato Digestiva", 7.0),
+        ("Centrifugato Tonificante", 7.0),
+        ("Centrifugato Rinfrescante", 7.0),
+        ("Frullato fai da te", 6.0),
+        ("Spremuta di Arance", 3.5),
+        ("Spremuta di Pompelmo", 4.0),
+    ),
+    "Caffetteria": (
+        ("Caffè Espresso", 2.0),
+        ("Caffè Corretto", 2.5),
+        ("Caffè Americano", 2.0),
+        ("Caffè Shekerato", 3.0),
+        ("Caffè e Latte", 1.8),
+        ("Cappuccino", 2.0),
+        ("Cappuccino Soya/Avena/Senza Lattosio", 2.5),
+        ("Latte Macchiato", 1.8),
+        ("Ginseng Piccolo", 2.0),
+        ("Ginseng Grande", 2.5),
+        ("Orzo Piccolo", 2.0),
+        ("Orzo Grande", 2.5),
+        ("Marocchino", 2.5),
+    ),
+    "Caffè Special": (
+        ("Mister Tamo (espresso, Nutella, crema di latte, pistacchio)", 3.5),
+        ("Pistacchioso", 3.0),
+        ("Caramelloso", 3.0),
+        ("Nocciolino", 3.0),
+        ("Coccoloso", 3.0),
+        ("Pannoso", 3.0),
+        ("Marocchino Special", 3.0),
+        ("Shekerato Special", 3.5),
+    ),
+    "Cioccolate Calde": (
+        ("Cioccolata Calda al Latte", 3.5),
+        ("Cioccolata Calda Fondente", 3.5),
+        ("Cioccolata Calda con Panna", 4.0),
+        ("Cioccolata Calda con Panna e Fragole", 5.0),
+    ),
+    "Dolci – monoporzioni e torte": (
+        ("Tortino dal Cuore Caldo", 7.0),
+        ("Monoporzione Cioccolampone", 6.0),
+        ("Monoporzione Gianduiotto", 6.0),
+        ("Caprese Croccante", 6.0),
+        ("Tiramisù 2.0 Cioccolato e Caffè", 6.0),
+        ("Monoporzione Nuvola", 6.0),
+        ("Monoporzione Meringata", 6.0),
+        ("Monoporzione Ambra", 6.0),
+        ("Cheesecake Nutella (monoporzione)", 6.0),
+        ("Cheesecake Frutti Rossi (monoporzione)", 6.0),
+        ("Cheesecake Pistacchio (monoporzione)", 6.0),
+        ("Cheesecake Caramello Salato (monoporzione)", 6.0),
+        ("Eclair Cioccolato", 3.5),
+        ("Torta Sacher artigianale", 5.0),
+        ("Tiramisù Gluten/Lacto Free", 7.0),
+        ("Tortina Vegan di Carote", 4.0),
+        ("Brownies (anche gluten free)", 4.0),
+        ("Muffin Gluten Free", 3.5),
+        ("Torta della Nonna classica", 3.5),
+        ("Crostata Marmellata artigianale", 3.5),
+        ("Crostata Vegan – Albicocca e Avena", 3.5),
+    ),
+    "Dolci – pancakes": (
+        ("Pancakes Bueno", 9.0),
+        ("Pancakes Nutella e Banana", 7.0),
+        ("Pancakes Cioccolato Bianco e Frutti Rossi", 8.0),
+        ("Pancakes Sciroppo Acero", 8.0),
+        ("Pancakes Nutella, Fragole e Panna", 8.0),
+        ("Pancakes Pistacchio", 8.0),
+    ),
+    "Dolci – waffle": (
+        ("Waffle Sciroppo Acero, Banana e muesli", 7.0),
+        ("Waffle Nutella e Fragola", 8.0),
+        ("Waffle Crema e Frutti Rossi", 8.0),
+        ("Waffle Pistacchio", 8.0),
+        ("Waffle Cioccolato Bianco e Frutti Rossi", 8.0),
+    ),
+    "Dolci – muffin, donuts, biscotti": (
+        ("Muffin Vaniglia", 2.5),
+        ("Muffin Albicocca", 2.5),
+        ("Muffin Cioccolato", 2.5),
+        ("Muffin Mirtillo", 2.5),
+        ("Muffin Pistacchio", 2.5),
+        ("Muffin Cioccolato Bianco", 2.5),
+        ("Muffin Nutella Ferrero", 3.0),
+        ("Muffin Oreo", 3.0),
+        ("Donut Oreo", 2.5),
+        ("Donut Cioccolato", 2.5),
+        ("Donut Marshmallow", 2.5),
+        ("Macaron (vari gusti)", 2.5),
+        ("Pasticceria mignon (per pezzo)", 1.5),
+        ("Mix Pasticceria mignon (5 pezzi)", 6.0),
+        ("Pasticciotto Pugliese (crema o amarena)", 2.0),
+        ("Cornetto Gluten Free", 2.7),
+        ("Lieviti assortiti", 1.5),
+        ("Biscotteria da the (per pezzo)", 0.8),
+        ("Mix Biscotteria da the (5 pezzi)", 3.5),
+        ("Biscotti Zenzero e Cannella", 1.0),
+        ("Biscotti Mirtillo e Bacche di Goji", 1.0),
+    ),
+    "Vini – bianchi": (
+        ("Calice Gewürztraminer", 6.0),
+        ("Calice Kikè (Cantina Fina)", 6.0),
+        ("Calice Ribolla Gialla", 5.5),
+        ("Calice Sauvignon", 5.5),
+        ("Calice Chardonnay", 5.5),
+    ),
+    "Vini – rossi": (
+        ("Calice Shiraz", 6.0),
+        ("Calice Primitivo", 5.5),
+        ("Calice Chianti Classico", 5.5),
+    ),
+    "Bollicine (Prosecco)": (
+        ("Calice Prosecco Cuvée", 5.0),
+    ),
+    "Birre (bottiglia 33 cl)": (
+        ("Tennent’s", 4.0),
+        ("Beck’s", 4.0),
+        ("Menabrea", 4.0),
+        ("Menabrea Rossa", 4.0),
+        ("Messina Cristalli di Sale", 4.0),
+        ("Ichnusa", 4.0),
+        ("Ichnusa Non Filtrata", 4.0),
+    ),
+    "Soft drinks": (
+        ("Coca‑cola (bottiglia vetro)", 3.5),
+        ("Coca‑cola Zero (bottiglia vetro)", 3.5),
+        ("Fanta (bottiglia vetro)", 3.5),
+        ("Aranciata amara", 2.5),
+        ("Schweppes Ginger Beer", 3.5),
+        ("Schweppes Lemon", 3.5),
+        ("Schweppes Soda", 3.5),
+        ("Red Bull", 3.5),
+        ("Chinotto (bottiglia vetro)", 3.5),
+        ("Cedrata", 3.5),
+        ("Thè freddo (PET)", 3.0),
+        ("Thè freddo (bicchiere)", 2.5),
+        ("Succo di frutta (vari gusti)", 3.0),
+        ("Succo mirtillo", 3.5),
+        ("Succo pesca e mango", 3.5),
+        ("Succo melograno", 3.5),
+    ),
+    "Rum (selezione)": (
+        ("Havana 7", 6.0),
+        ("Legendario Elixir", 8.0),
+        ("Barcelò", 8.0),
+        ("Don Papa", 8.0),
+        ("Zacapa 23", 9.0),
+    ),
+    "Amari e Grappe": (
+        ("Jägermeister", 3.5),
+        ("Lucano", 3.5),
+        ("Montenegro", 3.5),
+        ("Amaro del Capo", 3.5),
+        ("Amaro del Capo Red Hot", 4.5),
+        ("Brancamenta", 3.5),
+        ("Fernet Branca", 3.5),
+        ("Averna", 3.5),
+        ("Unicum", 3.5),
+        ("Grappa 3.0", 3.5),
+        ("Grappa 3.0 barricata", 4.6),
+        ("Grappa 903 barricata", 4.6),
+    ),
+    "Whisky & Cognac": (
+        ("Jack Daniel’s", 5.8),
+        ("Jim Beam", 5.8),
+        ("Wild Turkey", 5.8),
+        ("Cognac Hartell VS", 5.5),
+    ),
+    "Spirits": (
+        ("Bitter Campari", 4.5),
+        ("Stravecchio", 3.5),
+        ("Vecchia Romagna", 3.5),
+        ("Disaronno", 3.5),
+        ("Elisir Gambrinus", 3.5),
+        ("Limoncello", 3.5),
+        ("Sambuca Molinari", 3.5),
+    ),
+    "Tea & Infusions": (
+        ("English Breakfast (Black Tea)", 3.5),
+        ("Earl Grey (Black Tea)", 3.5),
+        ("Earl Grey Night (decaffeinated)", 3.5),
+        ("Lemon (Black Tea)", 3.5),
+        ("Winter Tea (Black Tea con Cannella e Chiodi di Garofano)", 3.5),
+        ("Red Fruits (Black Tea con frutti rossi)", 3.5),
+        ("China Green Tea", 3.5),
+        ("Wood Flavour (Fruit Infusion)", 3.5),
+        ("Blueberry Cherry (Fruit Infusion)", 3.5),
+        ("Moonlight (Herbal Infusion al Finocchio)", 3.5),
+        ("Golden Flowers (Herbal Infusion)", 3.5),
+    ),
+})
+
+# Identifies the current content of the menu.  Streamlit keys its caches on
+# the source of the cached function but not on the globals it reads, so the
+# menu builders below take this value as an argument: editing the menu and
+# rerunning (or hot-reloading the app) then builds everything again instead
+# of serving the old records.  Hashing the tuples is cheap, and the value
+# only has to be stable within one process.
+MENU_VERSION = hash(tuple(MENU_BY_CATEGORY.items()))
+
+
+@st.cache_resource(show_spinner=False)
+def build_flat_menu(
+    menu_version: int,
+) -> tuple[tuple[str, ...], tuple[tuple[int, str, float], ...]]:
+    """Return the menu as immutable category names and flat item records.
+
+    The first tuple lists the category names in menu order; the second holds
+    one ``(category_index, item_name, price)`` record per item, grouped by
+    category in the same order.  Streamlit executes the script again on
+    every rerun, so the records are built once per ``menu_version`` from
+    ``MENU_BY_CATEGORY`` and shared as a cached resource.  Item names are
+    interned so that equal names are always one shared string object.
+    """
+    categories = tuple(MENU_BY_CATEGORY)
+    records = tuple(
+        (cat_idx, sys.intern(item_name), price)
+        for cat_idx, items in enumerate(MENU_BY_CATEGORY.values())
+        for item_name, price in items
+    )
+    return categories, records
+
+
+CATEGORIES, MENU = build_flat_menu(MENU_VERSION)
+
+
+# The session-state keys used by every category, by index.  Each entry holds
+# the ``(open_flag, show_button, form, editor)`` keys of one category, so the
+# render path and the callbacks look them up by index.  Formatting these few
+# strings on each run is cheaper than a cached call, which still has to hash
+# its arguments on every rerun.
+CATEGORY_KEYS: Final[tuple[tuple[str, str, str, str], ...]] = tuple(
+    (f"open_{cat_idx}", f"show_{cat_idx}", f"form_{cat_idx}", f"editor_{cat_idx}")
+    for cat_idx in range(len(CATEGORIES))
+)
+
+
+@st.cache_data(show_spinner=False)
+def build_category_frames(menu_version: int) -> list[pd.DataFrame]:
+    """Return one editable DataFrame per menu category, in category order.
+
+    Each frame has the columns ``Prodotto``, ``Prezzo`` and ``Quantità``
+    (initially zero) and is rendered with ``st.data_editor`` so that a whole
+    category is a single widget instead of one ``number_input`` per item.
+    The frames are built in a single pass over the flat ``MENU`` records,
+    which are already grouped by category, once per ``menu_version``.
+    """
+    frames = []
+    for _, records in itertools.groupby(MENU, key=itemgetter(0)):
+        _, item_names, prices = zip(*records)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Prodotto": item_names,
+                    "Prezzo": prices,
+                    "Quantità": [0] * len(item_names),
+                }
+            )
+        )
+    return frames
+
+
+@st.cache_resource(show_spinner=False)
+def build_menu_soa(
+    menu_version: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return a flat structure-of-arrays view of the menu.
+
+    The first three parallel arrays are the item names (``object`` dtype),
+    their prices in integer euro cents as ``int32`` and the index of each
+    item's category as ``int32``, taken from the ``MENU`` records.  Keeping
+    prices in cents makes line totals and order totals exact integer
+    arithmetic, with no float rounding.  The position of an item in
+    these arrays is its integer id, and totals can be computed as a single
+    dot product against an array of quantities.  The fourth array holds the
+    id of the first item of every category: the item on row ``r`` of a
+    category table has id ``first_ids[category_index] + r``.
+
+    The result is cached as a shared resource for each ``menu_version``, so
+    every rerun and session gets the very same objects instead of an
+    unpickled copy.  The arrays are therefore read-only.
+    """
+    cat_idx, names, prices = zip(*MENU)
+    names = np.array(names, dtype=object)
+    prices_cents = np.rint(np.array(prices, dtype=np.float64) * 100).astype(np.int32)
+    cat_index = np.array(cat_idx, dtype=np.int32)
+    first_ids = np.searchsorted(cat_index, np.arange(len(CATEGORIES)))
+    for array in (names, prices_cents, cat_index, first_ids):
+        array.flags.writeable = False
+    return names, prices_cents, cat_index, first_ids
+
+
+def _update_category(cat_idx: int, first_id: int) -> None:
+    """Store the quantities edited in a category table in the session order.
+
+    Registered as the ``on_click`` callback of each category form's submit
+    button (widgets inside a form cannot have callbacks of their own), so it
+    only runs for the table the user has just submitted.  The order is kept
+    in ``st.session_state["qtys"]``, an ``int16`` array indexed by the
+    integer item ids of ``build_menu_soa()``, so products listed in more
+    than one category keep separate quantities.
+    """
+    _, _, _, editor_key = CATEGORY_KEYS[cat_idx]
+    edited_rows = st.session_state[editor_key]["edited_rows"]
+    if not edited_rows:
+        return
+    # Scatter all edited quantities into the array with a single assignment.
+    item_ids = first_id + np.fromiter(map(int, edited_rows), dtype=np.intp)
+    st.session_state["qtys"][item_ids] = [
+        int(changes.get("Quantità") or 0) for changes in edited_rows.values()
+    ]
+
+
+def _open_category(cat_idx: int) -> None:
+    """Mark a category as opened so that its table is rendered from now on."""
+    open_key, _, _, _ = CATEGORY_KEYS[cat_idx]
+    st.session_state[open_key] = True
+
+
+def render_category(cat_idx: int, first_id: int, frame: pd.DataFrame) -> None:
+    """Render the body of a category expander.
+
+    Streamlit runs the body of every expander on each rerun, even while it
+    is collapsed, so the category table is only created once the user has
+    asked to see it.  Until then the expander just shows a button.  Once
+    opened, a category keeps being rendered so its edits are not lost.
+    Widget keys come from ``CATEGORY_KEYS``.
+    """
+    open_key, show_key, form_key, editor_key = CATEGORY_KEYS[cat_idx]
+    if not st.session_state.get(open_key):
+        st.button(
+            "Mostra prodotti",
+            key=show_key,
+            on_click=_open_category,
+            args=(cat_idx,),
         )
-    if not rows:
         return
-    new_df = pd.DataFrame(rows)
-    if os.path.exists(ORDERS_FILE):
-        # Append to existing orders
-        existing = pd.read_csv(ORDERS_FILE)
-        combined = pd.concat([existing, new_df], ignore_index=True)
-        combined.to_csv(ORDERS_FILE, index=False)
+    category = CATEGORIES[cat_idx]
+    # Show a representative image for the category if available.  The
+    # browser fetches the URL, so a broken link does not raise here.
+    if img_url := CATEGORY_IMAGES.get(category):
+        st.image(img_url, use_container_width=True)
+    st.write(f"**{category}**")
+    # The table sits in a form so that edits are buffered in the browser and
+    # only one rerun happens when the quantities are confirmed.  Until then
+    # they are not part of the order, which the caption and the button help
+    # spell out.
+    with st.form(form_key, border=False):
+        st.data_editor(
+            frame,
+            key=editor_key,
+            num_rows="fixed",
+            disabled=["Prodotto", "Prezzo"],
+            hide_index=True,
+            column_config=EDITOR_COLUMN_CONFIG,
+        )
+        st.caption(
+            "Le quantità modificate entrano nell'ordine solo dopo aver premuto"
+            " «Aggiorna ordine»."
+        )
+        st.form_submit_button(
+            "Aggiorna ordine",
+            on_click=_update_category,
+            args=(cat_idx, first_id),
+            help="Aggiunge all'ordine le quantità inserite in questa tabella.",
+        )
+
+
+def _submit_order() -> None:
+    """Validate and save the current order.
+
+    Registered as the ``on_click`` callback of the "Invia ordine" button.
+    The name and quantities are read straight from ``st.session_state``, and
+    the outcome is left in ``st.session_state["submit_message"]`` as a
+    ``(level, text)`` pair that the following run displays.
+    """
+    name = st.session_state["customer_name"].strip()
+    qtys = st.session_state["qtys"]
+    if not name:
+        message = ("warning", "Per inviare l'ordine devi inserire il tuo nome.")
+    elif not qtys.any():
+        message = ("warning", "Seleziona almeno un prodotto prima di inviare l'ordine.")
     else:
-        # Write a new orders file with header
-        new_df.to_csv(ORDERS_FILE, index=False)
+        save_order_to_csv(name, qtys)
+        message = ("success", "Ordine inviato! Grazie per la tua scelta.")
+        # Dopo aver salvato l'ordine mostriamo il messaggio di conferma.
+        # Non modifichiamo esplicitamente i valori di session_state perché
+        # assegnare a un widget esistente all'interno di una callback
+        # può generare errori StreamlitAPIException.  Se desideri
+        # resettare le quantità manualmente, basta ricaricare la pagina
+        # (Ctrl‑R) oppure chiudere e riaprire l'app.
+    st.session_state["submit_message"] = message
 
 
-def load_orders_dataframe() -> pd.DataFrame | None:
-    """Load all orders from the CSV, if it exists, otherwise return None."""
-    if os.path.exists(ORDERS_FILE):
-        try:
-            return pd.read_csv(ORDERS_FILE)
-        except Exception:
-            return None
-    return None
+def _delete_row(row_index: int | None) -> None:
+    """Delete the order line selected in the admin view.
+
+    Registered as the ``on_click`` callback of the "Elimina ordine
+    selezionato" button, so the file is rewritten before the rerun that
+    Streamlit triggers for the click and no second, explicit rerun is
+    needed.  The cached orders are keyed on the files' versions and are
+    therefore refreshed by that same run.  The selection is reset, since
+    its position would now describe a different line.  As with the
+    submission, the outcome is left in ``st.session_state["delete_message"]``
+    as a ``(level, text)`` pair.
+    """
+    if row_index is None:
+        return
+    if delete_order_row(row_index):
+        message = ("success", "Ordine eliminato.")
+    else:
+        message = ("warning", "L'ordine selezionato non esiste più.")
+    st.session_state["selected_delete_index"] = 0
+    st.session_state["delete_message"] = message
 
 
-def build_menu() -> dict:
-    """Return the Mister TAMO menu as a dictionary.
+def render_summary() -> None:
+    """Display the itemised summary and total of the current selection.
 
-    The structure is a mapping from category name to a list of tuples
-    containing (item_name, price).  Prices are floats representing euros.
+    The summary has no widgets of its own: ``qtys`` only changes in the
+    form and button callbacks, which rerun the whole app, so it is simply
+    rendered from session state on every run.
     """
-    menu = {
-        "Aperitivo": [
-            ("Formula Gajardo (Apericena)", 15.0),
-            ("Formula Norcino (Apericena)", 15.0),
-            ("Formula Aperitamo (Aperitivo)", 12.0),
-        ],
-        "Analcolici (non‑alcoholic)": [
-            ("Tamo Fruit (Mela, Arancia, Anguria)", 5.0),
-            ("Hawaii (Fragola, Ananas)", 5.0),
-            ("Esotic (Passion Fruit, Lime, Zucchero di canna, Ginger Beer)", 5.0),
-            ("Virgin Mojito (Tonica, Lime, Zucchero di canna, Menta)", 5.0),
-            ("Virgin Colada (Ananas, Cocco)", 5.0),
-            ("Charlie Tample (Ginger Ale, Cranberry Juice)", 5.0),
-        ],
-        "Spritz": [
-            ("Apertas (Aperol, Cedrata)", 6.0),
-            ("Aperol Spritz", 6.0),
-            ("Campari Spritz", 6.0),
-            ("Calabro Spritz (Amaro del Capo Red Hot, Prosecco)", 7.0),
-            ("Hugo (Liquore di Sambuco, Prosecco, Menta)", 6.0),
-            ("Martini Royale (Martini Bianco, Lime, Prosecco)", 6.0),
-            ("Melon Spritz (Midori, Prosecco)", 6.0),
-            ("Passoa Spritz (Passoa, Prosecco)", 6.0),
-            ("Violetta Spritz (Liquore alla Violetta, Prosecco)", 6.0),
-        ],
-        "Negroni": [
-            ("Negroni", 8.0),
-            ("Negroni Sbagliato", 8.0),
-            ("Boulevardier", 8.0),
-            ("Negroni Bianco", 8.0),
-            ("Negroni al Cioccolato", 8.0),
-            ("Americano", 8.0),  # appears on the after‑dinner drinks list
-        ],
-        "Gin Tonic": [
-            ("Gin Tonic", 8.0),
-            ("Gin Lemon", 8.0),
-            ("Tanqueray Tonic", 10.0),
-            ("Tanqueray No. Ten Tonic", 12.0),
-            ("Malfy Pink Tonic", 12.0),
-            ("Bombay Tonic", 12.0),
-            ("Gin Mare Tonic", 12.0),
-        ],
-        "Mule": [
-            ("Moscow Mule", 8.0),
-            ("London Mule", 8.0),
-            ("Mexican Mule", 8.0),
-            ("Suffering Busterd", 8.0),
-        ],
-        "Pestati": [
-            ("Mojito", 9.0),
-            ("Caipiroska", 9.0),
-            ("Caipiroska Fragola", 9.0),
-            ("Caipiroska Frutti Rossi", 9.0),
-            ("Caipiroska Passion Fruit", 9.0),
-        ],
-        "Sour": [
-            ("Whiskey Sour", 8.0),
-            ("Midori Sour", 8.0),
-            ("Di Saronno Sour", 8.0),
-            ("New York Sour", 8.0),
-        ],
-        "Cocktail Pre‑Dinner": [
-            ("Morgana", 8.0),
-            ("Sky Walker", 8.0),
-            ("Paloma", 8.0),
-            ("Tequila Sunrise", 8.0),
-        ],
-        "Cocktail After‑Dinner": [
-            ("Mister Tamo", 8.0),
-            ("Alexander", 8.0),
-            ("Satan’s Whiskers", 8.0),
-            ("Long Island Ice Tea", 8.0),
-            ("Japanese Ice Tea", 8.0),
-            ("Miami Ice Tea", 8.0),
-            ("Pina Colada", 8.0),
-        ],
-        "Tiki Cocktails": [
-            ("Jungle Birth", 10.0),
-            ("Mister Funk", 10.0),
-        ],
-        "Salty dishes (Brunch)": [
-            ("Avocado Toast", 10.0),
-            ("Eggs Royal", 12.0),
-            ("Club Sandwich Tacchino", 9.0),
-            ("Club Sandwich Royal", 9.0),
-            ("English Breakfast", 10.0),
-            ("American Breakfast", 12.0),
-            ("French Toast", 9.0),
-            ("Caesar Salad (Brunch)", 12.0),
-        ],
-        "Primi e Secondi (Brunch)": [
-            ("Tonnarello Cacio e Pepe", 11.0),
-            ("Tonnarello Carbonara", 11.0),
-            ("Mezza Manica all’Amatriciana", 11.0),
-            ("Tonnarello Pomodoro e Basilico", 9.0),
-            ("Tagliata di Petto di Pollo (Lime e Menta)", 13.0),
-            ("Veggy Wrap", 9.0),
-        ],
-        "Sweet brunch (Pancakes e Waffles)": [
-            ("Baby Pancakes", 5.0),
-            ("Pancakes Cioccolato Bianco e Frutti di Bosco", 8.0),
-            ("Pancakes Nutella e Banana", 7.0),
-            ("Pancakes Nutella, Fragole e Panna", 8.0),
-            ("Pancakes Pistacchio", 7.0),
-            ("Pancakes Sciroppo Acero", 8.0),
-            ("Waffle Crema e Frutti di Bosco", 8.0),
-            ("Waffle Nutella e Fragola", 7.0),
-            ("Waffle Pistacchio", 7.0),
-            ("Waffle Sciroppo Acero", 7.0),
-            ("Waffle Cioccolato Bianco e Frutti di Bosco", 8.0),
-        ],
-        "Bio Zone": [
-            ("Centrifugato Depurante", 7.0),
-            ("Centrifugato Antiossidante", 7.0),
-            ("Centrifugato Digestiva", 7.0),
-            ("Centrifugato Tonificante", 7.0),
-            ("Centrifugato Rinfrescante", 7.0),
-            ("Frullato fai da te", 6.0),
-            ("Spremuta di Arance", 3.5),
-            ("Spremuta di Pompelmo", 4.0),
-        ],
-        "Caffetteria": [
-            ("Caffè Espresso", 2.0),
-            ("Caffè Corretto", 2.5),
-            ("Caffè Americano", 2.0),
-            ("Caffè Shekerato", 3.0),
-            ("Caffè e Latte", 1.8),
-            ("Cappuccino", 2.0),
-            ("Cappuccino Soya/Avena/Senza Lattosio", 2.5),
-            ("Latte Macchiato", 1.8),
-            ("Ginseng Piccolo", 2.0),
-            ("Ginseng Grande", 2.5),
-            ("Orzo Piccolo", 2.0),
-            ("Orzo Grande", 2.5),
-            ("Marocchino", 2.5),
-        ],
-        "Caffè Special": [
-            ("Mister Tamo (espresso, Nutella, crema di latte, pistacchio)", 3.5),
-            ("Pistacchioso", 3.0),
-            ("Caramelloso", 3.0),
-            ("Nocciolino", 3.0),
-            ("Coccoloso", 3.0),
-            ("Pannoso", 3.0),
-            ("Marocchino Special", 3.0),
-            ("Shekerato Special", 3.5),
-        ],
-        "Cioccolate Calde": [
-            ("Cioccolata Calda al Latte", 3.5),
-            ("Cioccolata Calda Fondente", 3.5),
-            ("Cioccolata Calda con Panna", 4.0),
-            ("Cioccolata Calda con Panna e Fragole", 5.0),
-        ],
-        "Dolci – monoporzioni e torte": [
-            ("Tortino dal Cuore Caldo", 7.0),
-            ("Monoporzione Cioccolampone", 6.0),
-            ("Monoporzione Gianduiotto", 6.0),
-            ("Caprese Croccante", 6.0),
-            ("Tiramisù 2.0 Cioccolato e Caffè", 6.0),
-            ("Monoporzione Nuvola", 6.0),
-            ("Monoporzione Meringata", 6.0),
-            ("Monoporzione Ambra", 6.0),
-            ("Cheesecake Nutella (monoporzione)", 6.0),
-            ("Cheesecake Frutti Rossi (monoporzione)", 6.0),
-            ("Cheesecake Pistacchio (monoporzione)", 6.0),
-            ("Cheesecake Caramello Salato (monoporzione)", 6.0),
-            ("Eclair Cioccolato", 3.5),
-            ("Torta Sacher artigianale", 5.0),
-            ("Tiramisù Gluten/Lacto Free", 7.0),
-            ("Tortina Vegan di Carote", 4.0),
-            ("Brownies (anche gluten free)", 4.0),
-            ("Muffin Gluten Free", 3.5),
-            ("Torta della Nonna classica", 3.5),
-            ("Crostata Marmellata artigianale", 3.5),
-            ("Crostata Vegan – Albicocca e Avena", 3.5),
-        ],
-        "Dolci – pancakes": [
-            ("Pancakes Bueno", 9.0),
-            ("Pancakes Nutella e Banana", 7.0),
-            ("Pancakes Cioccolato Bianco e Frutti Rossi", 8.0),
-            ("Pancakes Sciroppo Acero", 8.0),
-            ("Pancakes Nutella, Fragole e Panna", 8.0),
-            ("Pancakes Pistacchio", 8.0),
-        ],
-        "Dolci – waffle": [
-            ("Waffle Sciroppo Acero, Banana e muesli", 7.0),
-            ("Waffle Nutella e Fragola", 8.0),
-            ("Waffle Crema e Frutti Rossi", 8.0),
-            ("Waffle Pistacchio", 8.0),
-            ("Waffle Cioccolato Bianco e Frutti Rossi", 8.0),
-        ],
-        "Dolci – muffin, donuts, biscotti": [
-            ("Muffin Vaniglia", 2.5),
-            ("Muffin Albicocca", 2.5),
-            ("Muffin Cioccolato", 2.5),
-            ("Muffin Mirtillo", 2.5),
-            ("Muffin Pistacchio", 2.5),
-            ("Muffin Cioccolato Bianco", 2.5),
-            ("Muffin Nutella Ferrero", 3.0),
-            ("Muffin Oreo", 3.0),
-            ("Donut Oreo", 2.5),
-            ("Donut Cioccolato", 2.5),
-            ("Donut Marshmallow", 2.5),
-            ("Macaron (vari gusti)", 2.5),
-            ("Pasticceria mignon (per pezzo)", 1.5),
-            ("Mix Pasticceria mignon (5 pezzi)", 6.0),
-            ("Pasticciotto Pugliese (crema o amarena)", 2.0),
-            ("Cornetto Gluten Free", 2.7),
-            ("Lieviti assortiti", 1.5),
-            ("Biscotteria da the (per pezzo)", 0.8),
-            ("Mix Biscotteria da the (5 pezzi)", 3.5),
-            ("Biscotti Zenzero e Cannella", 1.0),
-            ("Biscotti Mirtillo e Bacche di Goji", 1.0),
-        ],
-        "Vini – bianchi": [
-            ("Calice Gewürztraminer", 6.0),
-            ("Calice Kikè (Cantina Fina)", 6.0),
-            ("Calice Ribolla Gialla", 5.5),
-            ("Calice Sauvignon", 5.5),
-            ("Calice Chardonnay", 5.5),
-        ],
-        "Vini – rossi": [
-            ("Calice Shiraz", 6.0),
-            ("Calice Primitivo", 5.5),
-            ("Calice Chianti Classico", 5.5),
-        ],
-        "Bollicine (Prosecco)": [
-            ("Calice Prosecco Cuvée", 5.0),
-        ],
-        "Birre (bottiglia 33 cl)": [
-            ("Tennent’s", 4.0),
-            ("Beck’s", 4.0),
-            ("Menabrea", 4.0),
-            ("Menabrea Rossa", 4.0),
-            ("Messina Cristalli di Sale", 4.0),
-            ("Ichnusa", 4.0),
-            ("Ichnusa Non Filtrata", 4.0),
-        ],
-        "Soft drinks": [
-            ("Coca‑cola (bottiglia vetro)", 3.5),
-            ("Coca‑cola Zero (bottiglia vetro)", 3.5),
-            ("Fanta (bottiglia vetro)", 3.5),
-            ("Aranciata amara", 2.5),
-            ("Schweppes Ginger Beer", 3.5),
-            ("Schweppes Lemon", 3.5),
-            ("Schweppes Soda", 3.5),
-            ("Red Bull", 3.5),
-            ("Chinotto (bottiglia vetro)", 3.5),
-            ("Cedrata", 3.5),
-            ("Thè freddo (PET)", 3.0),
-            ("Thè freddo (bicchiere)", 2.5),
-            ("Succo di frutta (vari gusti)", 3.0),
-            ("Succo mirtillo", 3.5),
-            ("Succo pesca e mango", 3.5),
-            ("Succo melograno", 3.5),
-        ],
-        "Rum (selezione)": [
-            ("Havana 7", 6.0),
-            ("Legendario Elixir", 8.0),
-            ("Barcelò", 8.0),
-            ("Don Papa", 8.0),
-            ("Zacapa 23", 9.0),
-        ],
-        "Amari e Grappe": [
-            ("Jägermeister", 3.5),
-            ("Lucano", 3.5),
-            ("Montenegro", 3.5),
-            ("Amaro del Capo", 3.5),
-            ("Amaro del Capo Red Hot", 4.5),
-            ("Brancamenta", 3.5),
-            ("Fernet Branca", 3.5),
-            ("Averna", 3.5),
-            ("Unicum", 3.5),
-            ("Grappa 3.0", 3.5),
-            ("Grappa 3.0 barricata", 4.6),
-            ("Grappa 903 barricata", 4.6),
-        ],
-        "Whisky & Cognac": [
-            ("Jack Daniel’s", 5.8),
-            ("Jim Beam", 5.8),
-            ("Wild Turkey", 5.8),
-            ("Cognac Hartell VS", 5.5),
-        ],
-        "Spirits": [
-            ("Bitter Campari", 4.5),
-            ("Stravecchio", 3.5),
-            ("Vecchia Romagna", 3.5),
-            ("Disaronno", 3.5),
-            ("Elisir Gambrinus", 3.5),
-            ("Limoncello", 3.5),
-            ("Sambuca Molinari", 3.5),
-        ],
-        "Tea & Infusions": [
-            ("English Breakfast (Black Tea)", 3.5),
-            ("Earl Grey (Black Tea)", 3.5),
-            ("Earl Grey Night (decaffeinated)", 3.5),
-            ("Lemon (Black Tea)", 3.5),
-            ("Winter Tea (Black Tea con Cannella e Chiodi di Garofano)", 3.5),
-            ("Red Fruits (Black Tea con frutti rossi)", 3.5),
-            ("China Green Tea", 3.5),
-            ("Wood Flavour (Fruit Infusion)", 3.5),
-            ("Blueberry Cherry (Fruit Infusion)", 3.5),
-            ("Moonlight (Herbal Infusion al Finocchio)", 3.5),
-            ("Golden Flowers (Herbal Infusion)", 3.5),
-        ],
-    }
-    return menu
+    st.header("Riepilogo ordine")
+    qtys = st.session_state["qtys"]
+    # Select the ordered items and compute their line totals in NumPy.  The
+    # summary is sent as a table (Arrow encoded) and the frontend formats the
+    # amounts, so no per-line string is built in Python.
+    idx = np.nonzero(qtys)[0]
+    if idx.size:
+        names, prices_cents, _, _ = build_menu_soa(MENU_VERSION)
+        line_cents = prices_cents[idx] * qtys[idx]
+        total_cents = int(line_cents.sum(dtype=np.int64))
+        summary = pd.DataFrame(
+            {
+                "Prodotto": names[idx],
+                "Quantità": qtys[idx],
+                "Totale": line_cents / 100,
+            }
+        )
+        st.dataframe(
+            summary,
+            hide_index=True,
+            use_container_width=True,
+            column_config=SUMMARY_COLUMN_CONFIG,
+        )
+        st.markdown(f"**Totale:** {format_cents(total_cents)}\u00a0€")
+    else:
+        st.info("Nessun prodotto selezionato. Usa i menu per aggiungere articoli al tuo ordine.")
 
 
 def main() -> None:
-    st.set_page_config(page_title="Mister TAMO Order Manager", page_icon="🍽️")
-    st.title("Mister TAMO – gestore ordini per la colazione/brunch/aperitivo")
-    st.write(
-        "Seleziona le quantità per ogni prodotto desiderato. I prezzi sono in euro e"
-        " comprendono il servizio al tavolo. Al termine della selezione troverai un"
-        " riassunto dell'ordine con il totale."
-    )
+    st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON)
+    st.title(APP_TITLE)
+    st.write(APP_INTRO)
+    migrate_legacy_orders()
 
-    menu = build_menu()
-    # Use a defaultdict to collect item quantities across categories
-    order_quantities: dict[str, int] = defaultdict(int)
+    category_frames = build_category_frames(MENU_VERSION)
+    names, _, _, first_ids = build_menu_soa(MENU_VERSION)
+    # The current selection lives in session_state as one quantity per menu
+    # item and is only updated by the form callbacks, so it survives reruns
+    # without re-reading every widget.  A session started before the menu
+    # gained or lost items starts a fresh selection, since its item ids no
+    # longer line up with the menu.
+    qtys = st.session_state.get("qtys")
+    if qtys is None or len(qtys) != len(names):
+        st.session_state["qtys"] = np.zeros(len(names), dtype=np.int16)
 
     # Iterate over categories, displaying each inside an expander.  If a
     # representative image URL is defined in `category_images`, it will be
     # displayed at the top of the expander.  This allows you to embed
-    # photos from the Mister Tamo website or other sources directly into
+    # photos from the Mister Tamo website or other sources directly into
     # the app without downloading them.  To add an image, populate
     # `category_images` with the category name and the desired URL.
-    for category, items in menu.items():
+    for cat_idx, (category, first_id) in enumerate(zip(CATEGORIES, first_ids.tolist())):
         with st.expander(category, expanded=False):
-            # Show a representative image for the category if available
-            img_url = category_images.get(category)
-            if img_url:
-                try:
-                    st.image(img_url, use_column_width=True)
-                except Exception:
-                    # If the image cannot be loaded, silently ignore
-                    pass
-            st.write(f"**{category}**")
-            for item_name, price in items:
-                key = f"qty_{category}_{item_name}"
-                qty = st.number_input(
-                    label=f"{item_name} – {price:.2f} €", min_value=0, step=1, key=key
-                )
-                if qty:
-                    order_quantities[(item_name, price)] += int(qty)
+            render_category(cat_idx, first_id, category_frames[cat_idx])
 
     # Ask the user for their name before computing the summary.  The name is
     # required when submitting the order so that it can be identified in the
-    # aggregated summary.
-    name = st.text_input(
+    # aggregated summary.  Its value is read from session_state by the submit
+    # callback.
+    st.text_input(
         "Inserisci il tuo nome (obbligatorio per inviare l'ordine)",
         value="",
+        key="customer_name",
         help="Il tuo nome verrà usato per identificare l'ordine nel riepilogo finale."
     )
 
     # Compute summary for the current selection
-    st.header("Riepilogo ordine")
-    if order_quantities:
-        total = 0.0
-        summary_lines = []
-        for (item_name, price), qty in order_quantities.items():
-            if qty <= 0:
-                continue
-            line_total = price * qty
-            total += line_total
-            summary_lines.append(
-                f"{item_name} × {qty} → {line_total:.2f}\u00a0€"
-            )
-        st.markdown("\n".join(summary_lines))
-        st.markdown(f"**Totale:** {total:.2f}\u00a0€")
-    else:
-        st.info("Nessun prodotto selezionato. Usa i menu per aggiungere articoli al tuo ordine.")
+    render_summary()
 
     # Buttons for submitting the order and viewing the aggregated summary
     submit_col, view_col = st.columns(2)
     with submit_col:
-        if st.button("Invia ordine"):
-            if not name.strip():
-                st.warning("Per inviare l'ordine devi inserire il tuo nome.")
-            elif not order_quantities:
-                st.warning("Seleziona almeno un prodotto prima di inviare l'ordine.")
+        st.button(
+            "Invia ordine",
+            on_click=_submit_order,
+            help=(
+                "Vengono inviate solo le quantità confermate con «Aggiorna ordine»"
+                " in ciascuna categoria: controlla il riepilogo prima di inviare."
+            ),
+        )
+        # Show the outcome of a submission only on the run right after it.
+        message = st.session_state.pop("submit_message", None)
+        if message is not None:
+            level, text = message
+            if level == "success":
+                st.success(text)
             else:
-                save_order_to_csv(name.strip(), order_quantities)
-                st.success("Ordine inviato! Grazie per la tua scelta.")
-                # Dopo aver salvato l'ordine mostriamo il messaggio di conferma.
-                # Non modifichiamo esplicitamente i valori di session_state perché
-                # assegnare a un widget esistente all'interno di una callback
-                # può generare errori StreamlitAPIException.  Se desideri
-                # resettare le quantità manualmente, basta ricaricare la pagina
-                # (Ctrl‑R) oppure chiudere e riaprire l'app.
+                st.warning(text)
 
     with view_col:
         # Use a persistent checkbox instead of a button so the summary remains
@@ -488,12 +1039,22 @@ def main() -> None:
         if show_summary:
             """
             Display a summary of all submitted orders and allow the organiser to
-            optionally delete individual orders.  Each row of the orders file
-            corresponds to a single line item from a user's order.  The
+            optionally delete individual orders.  Each row of the order lines
+            file corresponds to a single line item from a user's order and is
+            shown joined with the name and timestamp of its order.  The
             interface below lists all rows and a drop‑down menu to select one
-            for removal.  Upon deletion the CSV is overwritten with the
-            remaining rows and the summary tables are refreshed.
+            for removal.  Upon deletion the lines CSV is overwritten with the
+            remaining rows, an order left without lines is dropped from the
+            header CSV, and the summary tables are refreshed.
             """
+            # Show the outcome of a deletion only on the run right after it.
+            message = st.session_state.pop("delete_message", None)
+            if message is not None:
+                level, text = message
+                if level == "success":
+                    st.success(text)
+                else:
+                    st.warning(text)
             df_orders = load_orders_dataframe()
             if df_orders is None or df_orders.empty:
                 st.info("Nessun ordine inviato finora.")
@@ -502,45 +1063,51 @@ def main() -> None:
                 st.dataframe(df_orders)
 
                 # Provide a selectbox to choose an order line to delete.  The
-                # options consist of the integer indices of df_orders.  We
-                # prepend a sentinel None value so the user can choose not
-                # to delete anything.  The format_func shows a readable
-                # description for each row.
-                indices = df_orders.index.tolist()
-                options = [None] + indices
-                def format_option(idx):
-                    if idx is None:
-                        return "Nessuno"
-                    row = df_orders.loc[idx]
-                    # Construct a human‑readable label showing name, item and quantity
-                    return f"{row['name']} – {row['item']} (x{row['quantity']}) → {row['line_total']:.2f} €"
+                # options are positions in `labels`: position 0 is a "Nessuno"
+                # sentinel so the user can choose not to delete anything, and
+                # position n + 1 describes row n of df_orders.  The labels
+                # (name, item, quantity and line total) are built for all rows
+                # at once with vectorised string operations.
+                labels = ("Nessuno",) + tuple(
+                    df_orders["name"].astype(str)
+                    + " – "
+                    + df_orders["item"].astype(str)
+                    + " (x"
+                    + df_orders["quantity"].astype(str)
+                    + ") → "
+                    + df_orders["line_total"].map("{:.2f}\u00a0€".format)
+                )
 
                 # Original deletion mechanism replaced: persist selection via a key
-                selected_idx = st.selectbox(
+                selected = st.selectbox(
                     "Seleziona ordine da eliminare (opzionale)",
-                    options=options,
-                    format_func=format_option,
+                    options=range(len(labels)),
+                    format_func=labels.__getitem__,
                     index=0,
                     key="selected_delete_index",
                 )
-                delete_clicked = st.button("Elimina ordine selezionato")
-                if delete_clicked and selected_idx is not None:
-                    updated_df = df_orders.drop(selected_idx).reset_index(drop=True)
-                    updated_df.to_csv(ORDERS_FILE, index=False)
-                    st.success("Ordine eliminato.")
-                    st.experimental_rerun()
+                selected_idx = None if not selected else selected - 1
+                st.button(
+                    "Elimina ordine selezionato",
+                    on_click=_delete_row,
+                    args=(selected_idx,),
+                )
 
                 # Aggregate quantities and totals per product
-                agg = (
-                    df_orders.groupby("item")
-                    .agg(quantita=("quantity", "sum"), totale=("line_total", "sum"))
-                    .reset_index()
-                )
-                st.subheader("Riepilogo per prodotto")
-                st.table(agg)
-                totale_complessivo = agg["totale"].sum()
-                st.markdown(f"**Totale complessivo degli ordini:** {totale_complessivo:.2f}\u00a0€")
+                agg = aggregate_orders()
+                if agg is not None:
+                    st.subheader("Riepilogo per prodotto")
+                    st.table(agg)
+                    totale_complessivo = agg["totale"].sum()
+                    st.markdown(f"**Totale complessivo degli ordini:** {totale_complessivo:.2f}\u00a0€")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if os.environ.get("PROFILE"):
+        # Optional dependency, only needed when profiling the app.
+        from streamlit_profiler import Profiler
+
+        with Profiler():
+            main()
+    else:
+        main()